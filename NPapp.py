@@ -1,11 +1,12 @@
 import streamlit as st
 import pandas as pd
-import altair as alt
-from datetime import datetime, timedelta
-from PIL import Image
-import pytesseract
+import numpy as np
+import io
 import re
 
+# Attempt to match lines like: "Daytime Void 08:00 250 200 Y"
+_ROW_RE = re.compile(r"^(.*?)(\d{2}:\d{2})\s+(\d+)\s+(\d+)\s+([YN])$")
+
 # ------------------------------------------------------------------------------------------
 # Thai translation support
 # ------------------------------------------------------------------------------------------
@@ -15,8 +16,7 @@ st.set_page_config(
 )
 
 # ------------- (A) GLOBAL STYLING FOR 3D TABS & TABLE HEADERS + MOBILE-FRIENDLY CSS --------
-st.markdown(
-    """
+CSS_GLOBAL = """
     <style>
     /* Make the tabs look like 3D buttons */
     div[role="tablist"] > div[role="tab"] {
@@ -84,9 +84,31 @@ st.markdown(
         }
     }
     </style>
-    """,
-    unsafe_allow_html=True
-)
+    """
+st.markdown(CSS_GLOBAL, unsafe_allow_html=True)
+
+# ------------- (B) FLOWMIND-RA BRANDING HEADER ----------------------------------------------
+# Emitted on every run: Streamlit clears any element a rerun does not redraw
+CSS_BRAND = """
+<style>
+.flowmind-header {
+    font-size: 3rem;
+    font-weight: bold;
+}
+.flowmind-ra {
+    color: #2E8B8E;
+}
+.flowmind-mind {
+    color: #1A237E;
+}
+.flowmind-ra-orange {
+    color: #E65100;
+}
+</style>
+<div class="flowmind-header">
+    <span class="flowmind-ra">FLOW</span><span class="flowmind-mind">MIND</span><span class="flowmind-ra-orange">-RA</span>
+</div>
+"""
 
 # ------------------------------------------------------------------------------------------
 # 1. Utility Functions
@@ -96,34 +118,64 @@ def generate_time_slots():
     Generate time slots in 15-minute increments for a 24-hour period.
     Returns a list of HH:MM strings from 00:00 to 23:59.
     """
-    start_time = datetime.strptime("00:00", "%H:%M")
-    return [
-        (start_time + timedelta(minutes=15 * i)).strftime("%H:%M")
-        for i in range(96)
-    ]
+    return [f"{h:02d}:{m:02d}" for h in range(24) for m in (0, 15, 30, 45)]
+
+# One call per script run instead of two per Day tab
+_TIME_SLOTS = tuple(generate_time_slots())
+_WAKE_DEFAULT_IDX = _TIME_SLOTS.index("06:00")
+_BED_DEFAULT_IDX = _TIME_SLOTS.index("22:00")
 
 def parse_time_to_minutes(time_str):
     """
     Convert 'HH:MM' string to integer minutes from 00:00.
     e.g. '01:15' -> 75
+    Raises ValueError for anything not shaped like 'HH:MM'.
     """
-    hh, mm = time_str.split(':')
-    return int(hh) * 60 + int(mm)
+    if (
+        len(time_str) != 5 or time_str[2] != ':'
+        or not (time_str.isascii() and time_str[:2].isdigit() and time_str[3:].isdigit())
+    ):
+        raise ValueError(f"expected 'HH:MM', got {time_str!r}")
+    # Digit arithmetic on the fixed layout avoids split() and int() parsing
+    return (
+        (ord(time_str[0]) - 48) * 600 + (ord(time_str[1]) - 48) * 60
+        + (ord(time_str[3]) - 48) * 10 + (ord(time_str[4]) - 48)
+    )
+
+def _times_to_minutes(times):
+    """
+    Vectorized parse_time_to_minutes for a Series of validated 'HH:MM' strings.
+    Returns an int16 ndarray (a day has at most 1439 minutes).
+    """
+    hours = times.str.slice(0, 2).astype(np.int16).to_numpy()
+    minutes = times.str.slice(3, 5).astype(np.int16).to_numpy()
+    return hours * 60 + minutes
+
+ACTIVITY_MAPPING = {
+    "First Morning Void": "First Morning Void",
+    "Daytime Void": "Daytime Void",
+    "Bedtime Void": "Bedtime Void",
+    "Nighttime Void": "Nighttime Void"
+}
+# Editor dropdown choices, one shared tuple instead of a fresh list per Day tab
+ACTIVITY_OPTIONS = tuple(ACTIVITY_MAPPING.values())
+# Lowercased name -> canonical name, plus one alternation regex for noisy OCR text
+_LC_ACTIVITY = {key.lower(): value for key, value in ACTIVITY_MAPPING.items()}
+_ACT_RE = re.compile("(" + "|".join(re.escape(key) for key in _LC_ACTIVITY) + ")", re.I)
 
 def normalize_activity(activity_text):
     """
     Map raw text to standard English FVC activity names.
     """
-    ACTIVITY_MAPPING = {
-        "First Morning Void": "First Morning Void",
-        "Daytime Void": "Daytime Void",
-        "Bedtime Void": "Bedtime Void",
-        "Nighttime Void": "Nighttime Void"
-    }
-    for key, value in ACTIVITY_MAPPING.items():
-        if key.lower() in activity_text.lower():
-            return value
-    return "Unknown Activity"
+    # Clean OCR text is usually already canonical: no strip()/lower() copies needed
+    exact = ACTIVITY_MAPPING.get(activity_text)
+    if exact is None:
+        exact = _LC_ACTIVITY.get(activity_text.strip().lower())
+    if exact is not None:
+        return exact
+    # OCR often leaves noise around the name; find it with a single scan
+    match = _ACT_RE.search(activity_text)
+    return _LC_ACTIVITY[match.group(1).lower()] if match else "Unknown Activity"
 
 def calculate_metrics(
     total_urine_volume: float, 
@@ -173,80 +225,86 @@ def calculate_metrics(
         "nbci": nbci,
     }
 
-def extract_table_from_image(uploaded_image):
+def _otsu_threshold(gray: np.ndarray) -> int:
+    """
+    Otsu's global threshold for a uint8 grayscale image (numpy-only, no OpenCV).
+    """
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    w0 = np.cumsum(hist)                    # pixels at or below each level
+    m0 = np.cumsum(hist * np.arange(256))   # intensity mass at or below each level
+    n, total = w0[-1], m0[-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between = (m0 * n - total * w0) ** 2 / (w0 * (n - w0))
+    return int(np.argmax(np.nan_to_num(between, nan=0.0, posinf=0.0)))
+
+@st.cache_data(show_spinner=False)
+def extract_table_from_image(image_bytes: bytes) -> pd.DataFrame:
     """
     OCR extraction for FVC table.
+    Cached on the raw upload bytes, so reruns with the same image skip Tesseract.
     """
-    image = Image.open(uploaded_image)
+    # Deferred so sessions that never upload an image don't load Pillow/pytesseract
+    from PIL import Image
+    import pytesseract
+
+    image = Image.open(io.BytesIO(image_bytes)).convert("L")
+    # Cap Tesseract's per-pixel cost on large phone photos
+    if max(image.size) > 2000:
+        image.thumbnail((2000, 2000))
+    # Binarize so Tesseract sees clean black-on-white text
+    gray = np.asarray(image)
+    binary = np.where(gray > _otsu_threshold(gray), 255, 0).astype(np.uint8)
+
     custom_config = r'--oem 3 --psm 6'
-    extracted_text = pytesseract.image_to_string(
-        image, 
+    words = pytesseract.image_to_data(
+        binary, 
         lang="eng", 
-        config=custom_config
+        config=custom_config,
+        output_type=pytesseract.Output.DATAFRAME
     )
 
-    rows = extracted_text.strip().split("\n")
-    structured_data = []
-    # Attempt to match lines like: "Daytime Void 08:00 250 200 Y"
-    pattern = r"^(.*?)(\d{2}:\d{2})\s+(\d+)\s+(\d+)\s+([YN])$"
-
-    for row in rows:
-        match = re.match(pattern, row)
-        if match:
-            activity, time_val, intake, output, leak = match.groups()
-            normalized_act = normalize_activity(activity.strip())
-            structured_data.append([
-                normalized_act,
-                time_val.strip(),
-                int(intake),
-                int(output),
-                leak.strip()
-            ])
-        else:
-            # If it doesn't match, place a placeholder row
-            structured_data.append([
-                "Unknown Activity",
-                "None",
-                0,
-                0,
-                "None"
-            ])
-
-    df = pd.DataFrame(
-        structured_data,
-        columns=[
-            "กิจกรรม (Activity)",
-            "เวลา (Time)",
-            "ดื่มน้ำ (Intake, ml)",
-            "ปัสสาวะ (Output, ml)",
-            "รั่ว (Leak, Y/N)"
-        ]
+    # Rebuild text lines from word boxes; conf == -1 marks layout rows, not words.
+    # (line_num restarts within each paragraph, so group on all three levels.)
+    words = words[(words["conf"] >= 0) & words["text"].notna()]
+    rows = (
+        words["text"].astype(str)
+        .groupby([words["block_num"], words["par_num"], words["line_num"]])
+        .agg(" ".join)
+        .reset_index(drop=True)
     )
+
+    # Match every line in one vectorized pass; lines that don't match come back as NaN
+    # and become the usual placeholder row ("Unknown Activity", "None", 0, 0, "None")
+    parts = rows.str.extract(_ROW_RE)
+    df = pd.DataFrame({
+        "กิจกรรม (Activity)": parts[0].fillna("").str.strip().map(normalize_activity),
+        "เวลา (Time)": parts[1].fillna("None"),
+        "ดื่มน้ำ (Intake, ml)": parts[2].fillna(0).astype(int),
+        "ปัสสาวะ (Output, ml)": parts[3].fillna(0).astype(int),
+        "รั่ว (Leak, Y/N)": parts[4].fillna("None"),
+    })
     return df
 
 # ------------------------------------------------------------------------------------------
 # 2. Dashboard / Visualization Functions
 # ------------------------------------------------------------------------------------------
-def plot_dashboard(df: pd.DataFrame):
+# English FVC activity name -> Thai + English chart legend label
+LEGEND_MAPPING = {
+    "First Morning Void": "ตื่นนอน (First Morning Void)",
+    "Daytime Void": "ปัสสาวะในระหว่างวัน (Daytime Void)",
+    "Bedtime Void": "ปัสสาวะก่อนนอน (Bedtime Void)",
+    "Nighttime Void": "ปัสสาวะกลางคืน (Nighttime Void)"
+}
+
+@st.cache_resource
+def _donut_chart_template():
     """
-    3D-like donut chart with Thai + English labels.
+    Data-free donut chart spec, built once and shared; callers attach data via .properties().
     """
-    LEGEND_MAPPING = {
-        "First Morning Void": "ตื่นนอน (First Morning Void)",
-        "Daytime Void": "ปัสสาวะในระหว่างวัน (Daytime Void)",
-        "Bedtime Void": "ปัสสาวะก่อนนอน (Bedtime Void)",
-        "Nighttime Void": "ปัสสาวะกลางคืน (Nighttime Void)"
-    }
-    df_for_chart = df.copy()
-    # Safely handle any rows that lack the activity column or have "Unknown Activity"
-    df_for_chart["กิจกรรม (Activity)"] = df_for_chart["กิจกรรม (Activity)"].apply(
-        lambda x: LEGEND_MAPPING.get(x, "Unknown Activity")
-    )
-
-    grouped_data = df_for_chart.groupby("กิจกรรม (Activity)")["ปัสสาวะ (Output, ml)"].sum().reset_index()
+    import altair as alt  # deferred: only needed once results are charted
 
-    chart = (
-        alt.Chart(grouped_data)
+    return (
+        alt.Chart()
         .mark_arc(innerRadius=50)
         .encode(
             theta=alt.Theta(field="ปัสสาวะ (Output, ml)", type="quantitative"),
@@ -263,11 +321,341 @@ def plot_dashboard(df: pd.DataFrame):
             title="Voiding Volume by Activity (3D-like Donut)"
         )
     )
+
+def plot_dashboard(df: pd.DataFrame):
+    """
+    3D-like donut chart with Thai + English labels.
+    """
+    # An all-zero table would chart nothing; skip building and sending the spec
+    if df["ปัสสาวะ (Output, ml)"].sum() == 0:
+        st.info("ℹ️ ไม่มีข้อมูลปัสสาวะสำหรับแสดงกราฟ (No voiding data to chart)")
+        return
+
+    # Blank/NaN activities become "Unknown Activity" up front (object dtype, so the
+    # Categorical from the submit handler can't drop them as a NaN group)
+    activity = df["กิจกรรม (Activity)"].astype(object).fillna("Unknown Activity")
+
+    # Aggregate first, then relabel the handful of activity buckets instead of every row;
+    # labels outside the mapping collapse into the single "Unknown Activity" bucket
+    grouped_data = (
+        df["ปัสสาวะ (Output, ml)"].groupby(activity, sort=False)
+        .sum()
+        .groupby(lambda label: LEGEND_MAPPING.get(label, "Unknown Activity"), sort=False)
+        .sum()
+        .rename_axis("กิจกรรม (Activity)")
+        .reset_index()
+    )
+
+    # properties() returns a shallow copy, so the cached template is never mutated
+    chart = _donut_chart_template().properties(data=grouped_data)
     st.altair_chart(chart, use_container_width=True)
 
 # ------------------------------------------------------------------------------------------
 # 3. Main App
 # ------------------------------------------------------------------------------------------
+# Example / starting rows shared by every Day tab: built once per script run, not once per tab
+_DEFAULT_COLS = [
+    "กิจกรรม (Activity)",
+    "เวลา (Time)",
+    "ดื่มน้ำ (Intake, ml)",
+    "ปัสสาวะ (Output, ml)",
+    "รั่ว (Leak, Y/N)"
+]
+_DEFAULT_ROWS = [
+    ["First Morning Void", "06:00", 0, 150, "N"],
+    ["Daytime Void", "08:00", 250, 200, "N"],
+    ["Daytime Void", "12:00", 300, 250, "N"],
+    ["Daytime Void", "18:00", 400, 300, "N"],
+    ["Bedtime Void", "22:00", 200, 100, "N"],
+    ["Nighttime Void", "02:00", 0, 150, "Y"],
+]
+_DEMO_DF = pd.DataFrame(_DEFAULT_ROWS, columns=_DEFAULT_COLS)
+
+def render_day(tab_label, user_age):
+    """
+    Inputs, OCR upload, editable chart and results for one Day tab.
+    """
+    st.markdown(f"## {tab_label}: Frequency Volume Chart")
+    st.write(
+        f"เก็บข้อมูลของ {tab_label}. "
+        "คุณสามารถอัปโหลดภาพ หรือใส่ข้อมูลด้านล่าง"
+    )
+
+    with st.expander(f"ตัวอย่างข้อมูล {tab_label}"):
+        st.dataframe(_DEMO_DF)
+
+    # (A) Body Weight Input
+    st.write("**กรุณากรอกน้ำหนักตัว (Body Weight, Kg):**")
+    body_weight = st.number_input(
+        f"[{tab_label}] น้ำหนักตัว (Body Weight, Kg)",
+        min_value=25.0,
+        step=0.1,
+        format="%.1f",
+        value=70.0  # Set default to 70 kg
+    )
+
+    # (B) Time Wake Up and Time Go to Bed
+    st.write("**กรุณากรอกเวลาตื่นนอน (Time Wake Up) และเวลาที่เข้านอน (Time Go to Bed):**")
+    wake_up_time = st.selectbox(
+        f"[{tab_label}] เวลาตื่นนอน (Time Wake Up)",
+        _TIME_SLOTS,
+        index=_WAKE_DEFAULT_IDX  # default 06:00
+    )
+    bed_time = st.selectbox(
+        f"[{tab_label}] เวลาที่เข้านอน (Time Go to Bed)",
+        _TIME_SLOTS,
+        index=_BED_DEFAULT_IDX  # default 22:00
+    )
+
+    # (C) OCR File Uploader
+    uploaded_image = st.file_uploader(
+        f"📤 อัปโหลดภาพตารางข้อมูลสำหรับ {tab_label}",
+        type=["jpg", "png", "jpeg"]
+    )
+    extracted_data = None
+    if uploaded_image:
+        st.write("⌛ กำลังประมวลผลภาพ (Processing uploaded image)...")
+        try:
+            extracted_data = extract_table_from_image(uploaded_image.getvalue())
+            st.write("✅ ข้อมูลที่ได้จากภาพ (Data extracted from image):")
+            st.dataframe(extracted_data)
+        except Exception as e:
+            st.error(f"⚠️ ไม่สามารถประมวลผลภาพได้ (Failed to process image): {e}")
+
+    # (D) Prepare data for the table
+    with st.form(f"frequency_volume_chart_form_{tab_label}"):
+        if extracted_data is not None:
+            # OCR rows may not carry a contiguous 0..n-1 index
+            data = extracted_data.reset_index(drop=True)
+        else:
+            # Copy: the row-number column is inserted into this frame below
+            data = _DEMO_DF.copy()
+
+        st.write(f"**ตารางบันทึกข้อมูล {tab_label}** (Edit data in the table below):")
+
+        # (E) Setup row numbering as dropdown 1..50
+        if 'ลำดับ (No.)' in data.columns:
+            data.drop(columns=['ลำดับ (No.)'], inplace=True)
+
+        # Number rows 1..n, capping at 50 (the dropdown's last option)
+        data.insert(0, "ลำดับ (No.)", [min(n, 50) for n in range(1, len(data) + 1)])
+
+        # (F) Create a data_editor with "Leak" as a dropdown, "Activity" as a dropdown, etc.
+        st.markdown(
+            """
+            <div class="data-editor-container data-editor-fixed-height">
+            """,
+            unsafe_allow_html=True
+        )
+        edited_data = st.data_editor(
+            data,
+            num_rows="dynamic",
+            use_container_width=True,
+            height=300,  # Fixed height for better mobile usability
+            column_config={
+                "ลำดับ (No.)": st.column_config.SelectboxColumn(
+                    label="ลำดับ (No.)",
+                    options=list(range(1,51))
+                ),
+                "กิจกรรม (Activity)": st.column_config.SelectboxColumn(
+                    options=list(ACTIVITY_OPTIONS),
+                    label="กิจกรรม (Activity)"
+                ),
+                # Force 15-min increments in time
+                "เวลา (Time)": st.column_config.SelectboxColumn(
+                    options=_TIME_SLOTS,
+                    label="เวลา (Time)"
+                ),
+                # (1) NEW: leak column as dropdown with Y/N
+                "รั่ว (Leak, Y/N)": st.column_config.SelectboxColumn(
+                    options=["Y","N"],
+                    label="รั่ว (Leak, Y/N)"
+                )
+            }
+        )
+        st.markdown(
+            """
+            </div>
+            """,
+            unsafe_allow_html=True
+        )
+
+        submit_button = st.form_submit_button(f"วิเคราะห์ข้อมูล {tab_label} (Analyze Data)")
+
+    # -------------------- AFTER CLICK ANALYZE -----------------------
+    if submit_button:
+        st.subheader(f"📊 ผลลัพธ์ {tab_label} (Results)")
+
+        # Remove row-number column from final calc
+        # (edited_data isn't used again, so drop in place rather than copying the frame)
+        edited_data.drop(columns=["ลำดับ (No.)"], inplace=True, errors="ignore")
+        # The editor allows empty cells, so volumes can come back as object/float; cast once
+        for col in ("ดื่มน้ำ (Intake, ml)", "ปัสสาวะ (Output, ml)"):
+            edited_data[col] = pd.to_numeric(edited_data[col], errors="coerce").fillna(0).astype(np.int32)
+        # Drop fully blank rows (e.g. added but never filled): no activity, time or leak and zero volumes.
+        # Partly filled rows (e.g. a volume without a time) still count, as before.
+        text = edited_data[["กิจกรรม (Activity)", "เวลา (Time)", "รั่ว (Leak, Y/N)"]]
+        volumes = edited_data[["ดื่มน้ำ (Intake, ml)", "ปัสสาวะ (Output, ml)"]]
+        blank = (text.isna() | (text == "")).all(axis=1) & (volumes == 0).all(axis=1)
+        calc_data = edited_data[~blank.to_numpy()].reset_index(drop=True)
+        # Only 5 possible labels: group/compare on int8 category codes
+        calc_data["กิจกรรม (Activity)"] = pd.Categorical(
+            calc_data["กิจกรรม (Activity)"],
+            categories=[*ACTIVITY_OPTIONS, "Unknown Activity"]
+        )
+
+        # Minutes since 00:00 for every row with a valid HH:MM time (skips "None"/blank),
+        # computed once for the time-window checks below
+        times = calc_data["เวลา (Time)"].astype(str)
+        time_valid = times.str.match(r"^\d{2}:\d{2}$").to_numpy()
+        time_mins = _times_to_minutes(times[time_valid])
+
+        total_intake = calc_data["ดื่มน้ำ (Intake, ml)"].sum()
+        total_output = calc_data["ปัสสาวะ (Output, ml)"].sum()
+        # An all-blank table leaves no rows; report 0 rather than NaN
+        max_voided_volume = calc_data["ปัสสาวะ (Output, ml)"].max() if len(calc_data) else 0
+
+        # Per-activity output sums in one np.bincount over the category codes
+        activity_col = calc_data["กิจกรรม (Activity)"]
+        categories = activity_col.cat.categories
+        codes = activity_col.cat.codes.to_numpy()
+        known = codes >= 0  # -1 marks a blank / unlisted activity
+        output_col = calc_data["ปัสสาวะ (Output, ml)"]
+        output_sums = np.bincount(
+            codes[known],
+            weights=output_col.to_numpy(dtype=np.float64)[known],
+            minlength=len(categories)
+        ).astype(np.int64)  # volumes are whole ml (int32 above); keep integer display
+
+        # Combine nighttime + first morning void
+        nocturnal_output = (
+            output_sums[categories.get_loc("Nighttime Void")]
+            + output_sums[categories.get_loc("First Morning Void")]
+        )
+        # Count straight off the int8 category codes, no filtered frame
+        nocturnal_urinations = int((codes == categories.get_loc("Nighttime Void")).sum())
+
+        # (2) Calculate metrics
+        metrics = calculate_metrics(
+            total_urine_volume=total_output,
+            nocturnal_urine_volume=nocturnal_output,
+            max_voided_volume=max_voided_volume,
+            actual_night_urinations=nocturnal_urinations,
+            user_age=user_age
+        )
+
+        # Display results
+        st.write(f"**ปริมาณของเหลวที่ดื่มทั้งหมด (Total Fluid Intake):** {total_intake} ml")
+        st.write(f"**ปริมาณปัสสาวะทั้งหมด (Total Urine Volume):** {total_output} ml")
+        st.write(f"**ปริมาณปัสสาวะกลางคืน (Nocturnal Urine Volume):** {nocturnal_output} ml")
+        st.write(f"**ปริมาณปัสสาวะสูงสุด (Max Voided Volume):** {max_voided_volume} ml")
+        st.write(f"**จำนวนครั้งที่ปัสสาวะตอนกลางคืน (Nighttime Voids):** {nocturnal_urinations}")
+        st.write(f"**ดัชนี Nocturnal Polyuria (NPI):** {metrics['npi']:.2f}%")
+        st.write(f"**ดัชนี Nocturia (Ni):** {metrics['ni']:.2f}")
+        st.write(f"**จำนวนครั้งที่คาดว่าจะปัสสาวะตอนกลางคืน (PNV):** {metrics['pnv']:.2f}")
+        st.write(f"**ดัชนีความจุของกระเพาะปัสสาวะตอนกลางคืน (NBCI):** {metrics['nbci']:.2f}")
+
+        # Interpretations
+        if metrics["total_urine_flag"]:
+            st.warning(
+                "⚠️ ตรวจพบ 24-Hour Polyuria: ปริมาณปัสสาวะทั้งหมดเกิน 40 ml/kg "
+                "(Total Urine Volume > 40 ml/kg)."
+            )
+        else:
+            st.success("✅ ไม่พบ 24-Hour Polyuria (No 24-Hour Polyuria Detected).")
+
+        if metrics["nocturnal_polyuria_flag"]:
+            st.warning("⚠️ ตรวจพบ Nocturnal Polyuria.")
+        else:
+            st.success("✅ ไม่พบ Nocturnal Polyuria.")
+
+        # Check if there's intake in 4 hrs before bedtime
+        if metrics["nocturnal_polyuria_flag"]:
+            bed_time_mins = parse_time_to_minutes(bed_time)
+            cutoff = bed_time_mins - 240  # 4 hours => 240 minutes
+            if cutoff < 0:
+                cutoff += 1440
+
+            intake_arr = calc_data["ดื่มน้ำ (Intake, ml)"].to_numpy()[time_valid]
+            if cutoff < bed_time_mins:
+                window_mask = (time_mins >= cutoff) & (time_mins < bed_time_mins)
+            else:
+                # Window wraps past midnight
+                window_mask = (time_mins >= cutoff) | (time_mins < bed_time_mins)
+            found_4hr_intake = bool(((intake_arr > 0) & window_mask).any())
+            if found_4hr_intake:
+                st.info("💧มีการดื่มน้ำในช่วงเวลา 4 ชั่วโมงก่อนเข้านอน")
+
+        # NBCI
+        if metrics["nbci"] > 2:
+            st.warning(
+                "⚠️ NBCI > 2: ปริมาตรความจุของกระเพาะปัสสาวะตอนกลางคืน "
+                "น้อยกว่าปริมาตรความจุสูงสุดของกระเพาะปัสสาวะ และมีการปัสสาวะตอนกลางคืนมาก "
+                "Associated with severe nocturia."
+            )
+        elif metrics["nbci"] > 1.3:
+            st.warning(
+                "⚠️ NBCI > 1.3: ปริมาตรความจุของกระเพาะปัสสาวะตอนกลางคืน "
+                "น้อยกว่าปริมาตรความจุสูงสุดของกระเพาะปัสสาวะ Related to diminished nocturnal "
+                "bladder capacity."
+            )
+        elif metrics["nbci"] > 0:
+            st.warning(
+                "⚠️ NBCI > 0: ⁉️สงสัยความจุกระเพาะปัสสาวะลดลง (Diminished Bladder Capacity suspected)."
+            )
+        else:
+            st.success(
+                "✅ ความจุกระเพาะปัสสาวะปกติ (No Diminished Bladder Capacity Detected)."
+            )
+
+        # (2) Sum the number of rows that have "Leak = Y"
+        num_leaks = int((calc_data["รั่ว (Leak, Y/N)"].to_numpy() == "Y").sum())
+
+        st.markdown(f"#### {tab_label} Dashboard Visualization (3D Pie)")
+
+        # Show "ปัสสาวะเล็ด" count above or near the chart
+        st.write(f"**ปัสสาวะเล็ด จำนวน {num_leaks} ครั้ง**")
+
+        st.write(
+            "Below is a 3D-like donut chart illustrating how each activity category "
+            f"contributed to total void volume on {tab_label}."
+        )
+        plot_dashboard(calc_data)
+
+        # ----------------------------------------------------------------------------------
+        # NEW FEATURES START HERE
+        # ----------------------------------------------------------------------------------
+
+        # 1. Calculate Proper Urine Output
+        proper_urine_output = body_weight * 0.5 * 24  # ml/day
+
+        st.write(f"**ควรปัสสาวะอย่างน้อยต่อวัน (Proper Urine Output):** {proper_urine_output:.2f} ml")
+
+        # 2. Compare Total Urine Output with Proper Urine Output
+        if total_output < proper_urine_output:
+            st.markdown("❓ **สงสัยปริมาณปัสสาวะ น้อยกว่า 0.5ml/kg/hr**")
+
+        # 3. Check if any interval between voiding times is more than 6 hours
+        # Reuse the minutes parsed once at the top of the handler
+        void_times_mins = time_mins
+
+        if len(void_times_mins) > 1:
+            # Gap from each sorted time to the next, last one wrapping to the first
+            void_arr = np.sort(void_times_mins)
+            intervals = np.roll(void_arr, -1) - void_arr
+            intervals = np.where(intervals > 0, intervals, intervals + 1440)  # wrap around midnight
+
+            # Check if any interval > 360 minutes (6 hours)
+            has_large_interval = bool((intervals > 360).any())
+
+            if has_large_interval:
+                st.markdown("🆘 **มีการบันทึกการปัสสาวะห่างกันเกิน 6 ชั่วโมง**")
+        
+
+        # ----------------------------------------------------------------------------------
+        # NEW FEATURES END HERE
+        # ----------------------------------------------------------------------------------
+
 def main():
     """
     Updated code with 4 changes:
@@ -279,29 +667,7 @@ def main():
     """
 
     # Branding
-    st.markdown(
-        """
-        <style>
-        .flowmind-header {
-            font-size: 3rem;
-            font-weight: bold;
-        }
-        .flowmind-ra {
-            color: #2E8B8E;
-        }
-        .flowmind-mind {
-            color: #1A237E;
-        }
-        .flowmind-ra-orange {
-            color: #E65100;
-        }
-        </style>
-        <div class="flowmind-header">
-            <span class="flowmind-ra">FLOW</span><span class="flowmind-mind">MIND</span><span class="flowmind-ra-orange">-RA</span>
-        </div>
-        """,
-        unsafe_allow_html=True
-    )
+    st.markdown(CSS_BRAND, unsafe_allow_html=True)
 
     st.header("Frequency Volume Chart Analysis Tool")
     st.write(
@@ -331,355 +697,11 @@ def main():
     user_age = st.sidebar.number_input("อายุผู้ใช้งาน (User Age)", min_value=0, step=1)
 
     if user_type == "ผู้ป่วย (Patient)":
-        # We'll need time_slots for the "เวลา (Time)" column in the table
-        full_time_slots = generate_time_slots()
-
         day_tabs = st.tabs(["Day1", "Day2", "Day3"])
         
         for idx, tab_label in enumerate(["Day1", "Day2", "Day3"], start=1):
             with day_tabs[idx-1]:
-                st.markdown(f"## {tab_label}: Frequency Volume Chart")
-                st.write(
-                    f"เก็บข้อมูลของ {tab_label}. "
-                    "คุณสามารถอัปโหลดภาพ หรือใส่ข้อมูลด้านล่าง"
-                )
-
-                with st.expander(f"ตัวอย่างข้อมูล {tab_label}"):
-                    demo_data = pd.DataFrame(
-                        columns=[
-                            "กิจกรรม (Activity)",
-                            "เวลา (Time)",
-                            "ดื่มน้ำ (Intake, ml)",
-                            "ปัสสาวะ (Output, ml)",
-                            "รั่ว (Leak, Y/N)"
-                        ],
-                        data=[
-                            ["First Morning Void", "06:00", 0, 150, "N"],
-                            ["Daytime Void", "08:00", 250, 200, "N"],
-                            ["Daytime Void", "12:00", 300, 250, "N"],
-                            ["Daytime Void", "18:00", 400, 300, "N"],
-                            ["Bedtime Void", "22:00", 200, 100, "N"],
-                            ["Nighttime Void", "02:00", 0, 150, "Y"],
-                        ]
-                    )
-                    st.dataframe(demo_data)
-
-                # (A) Body Weight Input
-                st.write("**กรุณากรอกน้ำหนักตัว (Body Weight, Kg):**")
-                body_weight = st.number_input(
-                    f"[{tab_label}] น้ำหนักตัว (Body Weight, Kg)",
-                    min_value=25.0,
-                    step=0.1,
-                    format="%.1f",
-                    value=70.0  # Set default to 70 kg
-                )
-
-                # (B) Time Wake Up and Time Go to Bed
-                st.write("**กรุณากรอกเวลาตื่นนอน (Time Wake Up) และเวลาที่เข้านอน (Time Go to Bed):**")
-                all_time_slots = generate_time_slots()  # 15-min increments for bedtime/wakeup
-                try:
-                    wake_up_default_index = all_time_slots.index("06:00")
-                except ValueError:
-                    wake_up_default_index = 24  # Fallback to 06:00 if not found
-
-                try:
-                    bed_time_default_index = all_time_slots.index("22:00")
-                except ValueError:
-                    bed_time_default_index = 88  # Fallback to 22:00 if not found
-
-                wake_up_time = st.selectbox(
-                    f"[{tab_label}] เวลาตื่นนอน (Time Wake Up)",
-                    all_time_slots,
-                    index=wake_up_default_index  # default 06:00
-                )
-                bed_time = st.selectbox(
-                    f"[{tab_label}] เวลาที่เข้านอน (Time Go to Bed)",
-                    all_time_slots,
-                    index=bed_time_default_index  # default 22:00
-                )
-
-                # (C) OCR File Uploader
-                uploaded_image = st.file_uploader(
-                    f"📤 อัปโหลดภาพตารางข้อมูลสำหรับ {tab_label}",
-                    type=["jpg", "png", "jpeg"]
-                )
-                extracted_data = None
-                if uploaded_image:
-                    st.write("⌛ กำลังประมวลผลภาพ (Processing uploaded image)...")
-                    try:
-                        extracted_data = extract_table_from_image(uploaded_image)
-                        st.write("✅ ข้อมูลที่ได้จากภาพ (Data extracted from image):")
-                        st.dataframe(extracted_data)
-                    except Exception as e:
-                        st.error(f"⚠️ ไม่สามารถประมวลผลภาพได้ (Failed to process image): {e}")
-
-                activity_options = [
-                    "First Morning Void",
-                    "Daytime Void",
-                    "Bedtime Void",
-                    "Nighttime Void"
-                ]
-
-                # (D) Prepare data for the table
-                with st.form(f"frequency_volume_chart_form_{tab_label}"):
-                    if extracted_data is not None:
-                        data = extracted_data
-                    else:
-                        data = pd.DataFrame(
-                            columns=[
-                                "กิจกรรม (Activity)",
-                                "เวลา (Time)",
-                                "ดื่มน้ำ (Intake, ml)",
-                                "ปัสสาวะ (Output, ml)",
-                                "รั่ว (Leak, Y/N)"
-                            ],
-                            data=[
-                                [activity_options[0], "06:00", 0, 150, "N"],
-                                [activity_options[1], "08:00", 250, 200, "N"],
-                                [activity_options[1], "12:00", 300, 250, "N"],
-                                [activity_options[1], "18:00", 400, 300, "N"],
-                                [activity_options[2], "22:00", 200, 100, "N"],
-                                [activity_options[3], "02:00", 0, 150, "Y"],
-                            ]
-                        )
-
-                    st.write(f"**ตารางบันทึกข้อมูล {tab_label}** (Edit data in the table below):")
-
-                    # (E) Setup row numbering as dropdown 1..50
-                    data = data.reset_index(drop=True)
-                    if 'ลำดับ (No.)' in data.columns:
-                        data.drop(columns=['ลำดับ (No.)'], inplace=True)
-
-                    existing_numbers = [None] * len(data)
-                    valid_assigned = []
-                    max_num = 0  # track highest row number used so far
-
-                    # Fill each row with next available integer 1..50 if None
-                    for i in range(len(data)):
-                        if existing_numbers[i] is None:
-                            if max_num < 50:
-                                max_num += 1
-                                existing_numbers[i] = max_num
-                            else:
-                                existing_numbers[i] = 50
-
-                    data.insert(0, "ลำดับ (No.)", existing_numbers)
-
-                    # (F) Create a data_editor with "Leak" as a dropdown, "Activity" as a dropdown, etc.
-                    st.markdown(
-                        """
-                        <div class="data-editor-container data-editor-fixed-height">
-                        """,
-                        unsafe_allow_html=True
-                    )
-                    edited_data = st.data_editor(
-                        data,
-                        num_rows="dynamic",
-                        use_container_width=True,
-                        height=300,  # Fixed height for better mobile usability
-                        column_config={
-                            "ลำดับ (No.)": st.column_config.SelectboxColumn(
-                                label="ลำดับ (No.)",
-                                options=list(range(1,51))
-                            ),
-                            "กิจกรรม (Activity)": st.column_config.SelectboxColumn(
-                                options=activity_options,
-                                label="กิจกรรม (Activity)"
-                            ),
-                            # Force 15-min increments in time
-                            "เวลา (Time)": st.column_config.SelectboxColumn(
-                                options=full_time_slots,
-                                label="เวลา (Time)"
-                            ),
-                            # (1) NEW: leak column as dropdown with Y/N
-                            "รั่ว (Leak, Y/N)": st.column_config.SelectboxColumn(
-                                options=["Y","N"],
-                                label="รั่ว (Leak, Y/N)"
-                            )
-                        }
-                    )
-                    st.markdown(
-                        """
-                        </div>
-                        """,
-                        unsafe_allow_html=True
-                    )
-
-                    submit_button = st.form_submit_button(f"วิเคราะห์ข้อมูล {tab_label} (Analyze Data)")
-
-                # -------------------- AFTER CLICK ANALYZE -----------------------
-                if submit_button:
-                    st.subheader(f"📊 ผลลัพธ์ {tab_label} (Results)")
-
-                    # Remove row-number column from final calc
-                    calc_data = edited_data.drop(columns=["ลำดับ (No.)"], errors="ignore")
-
-                    total_intake = calc_data["ดื่มน้ำ (Intake, ml)"].sum()
-                    total_output = calc_data["ปัสสาวะ (Output, ml)"].sum()
-
-                    # Combine nighttime + first morning void
-                    nocturnal_output = calc_data[
-                        calc_data["กิจกรรม (Activity)"] == "Nighttime Void"
-                    ]["ปัสสาวะ (Output, ml)"].sum()
-                    first_morning_void = calc_data[
-                        calc_data["กิจกรรม (Activity)"] == "First Morning Void"
-                    ]["ปัสสาวะ (Output, ml)"].sum()
-                    nocturnal_output += first_morning_void
-
-                    max_voided_volume = calc_data["ปัสสาวะ (Output, ml)"].max()
-                    nocturnal_urinations = len(
-                        calc_data[
-                            calc_data["กิจกรรม (Activity)"] == "Nighttime Void"
-                        ]
-                    )
-
-                    # (2) Calculate metrics
-                    metrics = calculate_metrics(
-                        total_urine_volume=total_output,
-                        nocturnal_urine_volume=nocturnal_output,
-                        max_voided_volume=max_voided_volume,
-                        actual_night_urinations=nocturnal_urinations,
-                        user_age=user_age
-                    )
-
-                    # Display results
-                    st.write(f"**ปริมาณของเหลวที่ดื่มทั้งหมด (Total Fluid Intake):** {total_intake} ml")
-                    st.write(f"**ปริมาณปัสสาวะทั้งหมด (Total Urine Volume):** {total_output} ml")
-                    st.write(f"**ปริมาณปัสสาวะกลางคืน (Nocturnal Urine Volume):** {nocturnal_output} ml")
-                    st.write(f"**ปริมาณปัสสาวะสูงสุด (Max Voided Volume):** {max_voided_volume} ml")
-                    st.write(f"**จำนวนครั้งที่ปัสสาวะตอนกลางคืน (Nighttime Voids):** {nocturnal_urinations}")
-                    st.write(f"**ดัชนี Nocturnal Polyuria (NPI):** {metrics['npi']:.2f}%")
-                    st.write(f"**ดัชนี Nocturia (Ni):** {metrics['ni']:.2f}")
-                    st.write(f"**จำนวนครั้งที่คาดว่าจะปัสสาวะตอนกลางคืน (PNV):** {metrics['pnv']:.2f}")
-                    st.write(f"**ดัชนีความจุของกระเพาะปัสสาวะตอนกลางคืน (NBCI):** {metrics['nbci']:.2f}")
-
-                    # Interpretations
-                    if metrics["total_urine_flag"]:
-                        st.warning(
-                            "⚠️ ตรวจพบ 24-Hour Polyuria: ปริมาณปัสสาวะทั้งหมดเกิน 40 ml/kg "
-                            "(Total Urine Volume > 40 ml/kg)."
-                        )
-                    else:
-                        st.success("✅ ไม่พบ 24-Hour Polyuria (No 24-Hour Polyuria Detected).")
-
-                    if metrics["nocturnal_polyuria_flag"]:
-                        st.warning("⚠️ ตรวจพบ Nocturnal Polyuria.")
-                    else:
-                        st.success("✅ ไม่พบ Nocturnal Polyuria.")
-
-                    # Check if there's intake in 4 hrs before bedtime
-                    if metrics["nocturnal_polyuria_flag"]:
-                        bed_time_mins = parse_time_to_minutes(bed_time)
-                        cutoff = bed_time_mins - 240  # 4 hours => 240 minutes
-                        if cutoff < 0:
-                            cutoff += 1440
-
-                        found_4hr_intake = False
-                        for _, row in calc_data.iterrows():
-                            if row["ดื่มน้ำ (Intake, ml)"] > 0:
-                                t_str = row["เวลา (Time)"]
-                                try:
-                                    t_mins = parse_time_to_minutes(t_str)
-                                except:
-                                    continue  # skip invalid times
-                                if cutoff < bed_time_mins:
-                                    if cutoff <= t_mins < bed_time_mins:
-                                        found_4hr_intake = True
-                                        break
-                                else:
-                                    if t_mins >= cutoff or t_mins < bed_time_mins:
-                                        found_4hr_intake = True
-                                        break
-                        if found_4hr_intake:
-                            st.info("💧มีการดื่มน้ำในช่วงเวลา 4 ชั่วโมงก่อนเข้านอน")
-
-                    # NBCI
-                    if metrics["nbci"] > 2:
-                        st.warning(
-                            "⚠️ NBCI > 2: ปริมาตรความจุของกระเพาะปัสสาวะตอนกลางคืน "
-                            "น้อยกว่าปริมาตรความจุสูงสุดของกระเพาะปัสสาวะ และมีการปัสสาวะตอนกลางคืนมาก "
-                            "Associated with severe nocturia."
-                        )
-                    elif metrics["nbci"] > 1.3:
-                        st.warning(
-                            "⚠️ NBCI > 1.3: ปริมาตรความจุของกระเพาะปัสสาวะตอนกลางคืน "
-                            "น้อยกว่าปริมาตรความจุสูงสุดของกระเพาะปัสสาวะ Related to diminished nocturnal "
-                            "bladder capacity."
-                        )
-                    elif metrics["nbci"] > 0:
-                        st.warning(
-                            "⚠️ NBCI > 0: ⁉️สงสัยความจุกระเพาะปัสสาวะลดลง (Diminished Bladder Capacity suspected)."
-                        )
-                    else:
-                        st.success(
-                            "✅ ความจุกระเพาะปัสสาวะปกติ (No Diminished Bladder Capacity Detected)."
-                        )
-
-                    # (2) Sum the number of rows that have "Leak = Y"
-                    num_leaks = calc_data[calc_data["รั่ว (Leak, Y/N)"] == "Y"].shape[0]
-
-                    st.markdown(f"#### {tab_label} Dashboard Visualization (3D Pie)")
-
-                    # Show "ปัสสาวะเล็ด" count above or near the chart
-                    st.write(f"**ปัสสาวะเล็ด จำนวน {num_leaks} ครั้ง**")
-
-                    st.write(
-                        "Below is a 3D-like donut chart illustrating how each activity category "
-                        f"contributed to total void volume on {tab_label}."
-                    )
-                    plot_dashboard(calc_data)
-
-                    # ----------------------------------------------------------------------------------
-                    # NEW FEATURES START HERE
-                    # ----------------------------------------------------------------------------------
-
-                    # 1. Calculate Proper Urine Output
-                    proper_urine_output = body_weight * 0.5 * 24  # ml/day
-
-                    st.write(f"**ควรปัสสาวะอย่างน้อยต่อวัน (Proper Urine Output):** {proper_urine_output:.2f} ml")
-
-                    # 2. Compare Total Urine Output with Proper Urine Output
-                    if total_output < proper_urine_output:
-                        st.markdown("❓ **สงสัยปริมาณปัสสาวะ น้อยกว่า 0.5ml/kg/hr**")
-
-                    # 3. Check if any interval between voiding times is more than 6 hours
-                    # Convert times to minutes
-                    void_times = calc_data["เวลา (Time)"].tolist()
-                    void_times_mins = []
-                    for time_str in void_times:
-                        if time_str != "None":
-                            try:
-                                mins = parse_time_to_minutes(time_str)
-                                void_times_mins.append(mins)
-                            except:
-                                continue  # skip invalid times
-
-                    if len(void_times_mins) > 1:
-                        # Sort the times
-                        void_times_mins_sorted = sorted(void_times_mins)
-
-                        # Calculate intervals
-                        intervals = []
-                        for i in range(len(void_times_mins_sorted)):
-                            current = void_times_mins_sorted[i]
-                            next_idx = (i + 1) % len(void_times_mins_sorted)
-                            next_time = void_times_mins_sorted[next_idx]
-                            if next_time > current:
-                                interval = next_time - current
-                            else:
-                                interval = (1440 - current) + next_time  # wrap around midnight
-                            intervals.append(interval)
-
-                        # Check if any interval > 360 minutes (6 hours)
-                        has_large_interval = any(interval > 360 for interval in intervals)
-
-                        if has_large_interval:
-                            st.markdown("🆘 **มีการบันทึกการปัสสาวะห่างกันเกิน 6 ชั่วโมง**")
-                    
-
-                    # ----------------------------------------------------------------------------------
-                    # NEW FEATURES END HERE
-                    # ----------------------------------------------------------------------------------
+                render_day(tab_label, user_age)
 
     else:
         st.write("สำหรับแพทย์ (Doctor view) - คุณสามารถนำเสนอฟีเจอร์เพิ่มเติมได้ที่นี่ในอนาคต")